@@ -1,12 +1,32 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
 import joblib
-import requests
+import httpx
 import numpy as np
+import asyncio
 import os
-from typing import Dict, Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple
 
-app = FastAPI(title="Air Quality Prediction API")
+from aqi_index import AQI_BINS, NUMBA_AVAILABLE, aqi_buckets
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import tl2cgen
+except ImportError:
+    tl2cgen = None
+
+# orjson serialises responses (including numpy values) much faster than stdlib json
+app = FastAPI(title="Air Quality Prediction API", default_response_class=ORJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -17,26 +37,255 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load model with error handling
-try:
-    # Use relative path
-    model_path = os.path.join(os.path.dirname(__file__), "model.pkl")
-    model = joblib.load(model_path)
-    print("✅ Model loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    model = None
-
-def fetch_live_data(lat=28.6139, lon=77.2090) -> Dict[str, float]:
-    """Fetch live air quality data from Open-Meteo API"""
+class OnnxModel:
+    """RandomForest exported by export_onnx.py, served through ONNX Runtime"""
+
+    def __init__(self, path: str):
+        so = ort.SessionOptions()
+        so.intra_op_num_threads = 1  # Optimise for per-request latency
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, sess_options=so, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        # float64 output to match sklearn's predict and stay JSON-serialisable
+        return self.session.run(None, {self.input_name: X})[0].ravel().astype(np.float64)
+
+class CompiledForest:
+    """RandomForest compiled to a native library by export_treelite.py"""
+
+    def __init__(self, path: str):
+        self.predictor = tl2cgen.Predictor(path)
+
+    def predict(self, X) -> np.ndarray:
+        dmat = tl2cgen.DMatrix(np.asarray(X, dtype=np.float32))
+        # float64 output to match sklearn's predict and stay JSON-serialisable
+        return self.predictor.predict(dmat).ravel().astype(np.float64)
+
+# Name of the compiled forest library for this platform
+COMPILED_MODEL_NAME = "model.dll" if os.name == "nt" else "model.so"
+
+# Loaded in the startup event so each worker process loads it once without slowing imports
+model = None
+
+def load_model():
+    """Load the fastest available model backend, returning None if none can be loaded"""
+    # Use relative paths; prefer the compiled forest, then the ONNX export, then the pickled model
+    base_dir = os.path.dirname(__file__)
+    backends = [
+        ("Compiled", tl2cgen is not None, os.path.join(base_dir, COMPILED_MODEL_NAME), CompiledForest),
+        ("ONNX", ort is not None, os.path.join(base_dir, "model.onnx"), OnnxModel),
+        ("Pickled", True, os.path.join(base_dir, "model.pkl"), joblib.load)
+    ]
+    
+    # Each backend gets its own try, so a broken artifact falls through to the next one
+    for name, available, path, loader in backends:
+        if not available or not os.path.exists(path):
+            continue
+        try:
+            loaded = loader(path)
+            print(f"✅ {name} model loaded successfully!")
+            return loaded
+        except Exception as e:
+            print(f"❌ Error loading {name.lower()} model from {path}: {e}")
+    
+    print("❌ No model could be loaded")
+    return None
+
+# Open-Meteo refreshes hourly, so cache live readings per location
+CACHE_TTL = 600
+_live_cache: Dict[Tuple[float, float], Tuple[float, Dict[str, float]]] = {}
+_live_inflight: Dict[Tuple[float, float], asyncio.Task] = {}
+
+# Reusable (1, 8) float32 feature row per threadpool thread; float32 is what the trees compare against
+_tls = threading.local()
+
+def feature_buffer() -> np.ndarray:
+    buf = getattr(_tls, "buf", None)
+    if buf is None:
+        buf = _tls.buf = np.empty((1, 8), dtype=np.float32)
+    return buf
+
+def predict_row(features: Tuple[float, ...]) -> np.float64:
+    """Score one feature row; run in the threadpool so the forest doesn't block the event loop"""
+    X = feature_buffer()
+    X[0] = features
+    return model.predict(X)[0]
+
+# LRU of recent predictions keyed by feature tuple; readings change slowly so vectors recur
+PREDICTION_CACHE_SIZE = 1024
+_prediction_cache: "OrderedDict[Tuple[float, ...], np.float64]" = OrderedDict()
+
+def cached_prediction(features: Tuple[float, ...]):
+    """Return the cached prediction for a feature tuple, or None on a miss"""
+    prediction = _prediction_cache.get(features)
+    if prediction is not None:
+        _prediction_cache.move_to_end(features)
+    return prediction
+
+def cache_prediction(features: Tuple[float, ...], prediction) -> None:
+    _prediction_cache[features] = prediction
+    _prediction_cache.move_to_end(features)
+    if len(_prediction_cache) > PREDICTION_CACHE_SIZE:
+        _prediction_cache.popitem(last=False)
+
+# Micro-batching for /predict/custom: group concurrent requests into one model.predict call
+BATCH_MAX_SIZE = 32
+BATCH_MAX_WAIT = 0.01  # seconds
+
+# Largest /predict/batch request accepted, so one POST can't monopolise the scoring threads
+BATCH_REQUEST_MAX_ITEMS = 1000
+
+class CustomInput(BaseModel):
+    pm25: float
+    pm10: float
+    no2: float
+    so2: float
+    co: float
+    o3: float
+    nh3: float = 0.0
+
+class BatchRequest(BaseModel):
+    items: List[CustomInput]
+
+def check_finite(X: np.ndarray) -> None:
+    """Reject NaN/inf inputs, including values too large for float32, with a 422"""
+    if not np.isfinite(X).all():
+        raise HTTPException(status_code=422, detail="Pollutant values must be finite and within float32 range")
+
+def to_features(rows) -> np.ndarray:
+    # Values beyond float32 range become inf here and are then rejected by check_finite
+    with np.errstate(over="ignore"):
+        return np.asarray(rows, dtype=np.float32)
+
+def score_batch(X: np.ndarray) -> list:
+    """Score a batch, falling back to one row at a time so a bad row only fails itself"""
+    try:
+        return list(model.predict(X))
+    except Exception:
+        results = []
+        for i in range(X.shape[0]):
+            try:
+                results.append(model.predict(X[i:i + 1])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+def fail_pending(futures, exc: Exception) -> None:
+    for future in futures:
+        if not future.done():
+            future.set_exception(exc)
+
+async def batch_worker(queue: asyncio.Queue):
+    """Collect queued feature rows and score them with a single model.predict call"""
+    loop = asyncio.get_running_loop()
+    X = np.empty((BATCH_MAX_SIZE, 8), dtype=np.float32)
+    while True:
+        row, future = await queue.get()
+        X[0] = row
+        futures = [future]
+        deadline = loop.time() + BATCH_MAX_WAIT
+        try:
+            while len(futures) < BATCH_MAX_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    row, future = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                X[len(futures)] = row
+                futures.append(future)
+            
+            # Score off the event loop; X isn't refilled until this batch returns
+            results = await run_in_threadpool(score_batch, X[:len(futures)])
+        except asyncio.CancelledError:
+            # Shutting down mid-batch: fail the requests already taken off the queue
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as e:
+            fail_pending(futures, e)
+            raise
+
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+def batch_worker_done(task: asyncio.Task) -> None:
+    """Fail queued requests if the batch worker dies, instead of leaving them waiting forever"""
+    if task.cancelled():
+        return
+    print(f"❌ Batch worker stopped: {task.exception()}")
+    queue = app.state.batch_queue
+    while not queue.empty():
+        _, future = queue.get_nowait()
+        fail_pending([future], RuntimeError("Prediction worker stopped"))
+
+@app.on_event("startup")
+async def startup():
+    global model
+    model = load_model()
+    _prediction_cache.clear()
+    
+    # Shared client so concurrent requests reuse pooled connections
+    app.state.http = httpx.AsyncClient(
+        timeout=10,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+    )
+    app.state.batch_queue = asyncio.Queue()
+    app.state.batch_task = asyncio.create_task(batch_worker(app.state.batch_queue))
+    app.state.batch_task.add_done_callback(batch_worker_done)
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.batch_task.cancel()
     try:
-        url = f"https://air-quality-api.open-meteo.com/v1/air-quality?latitude={lat}&longitude={lon}&hourly=pm10,pm2_5,nitrogen_dioxide,sulphur_dioxide,carbon_monoxide,ozone&timezone=auto"
-        response = requests.get(url, timeout=10)
+        await app.state.batch_task
+    except asyncio.CancelledError:
+        pass
+    
+    # Fail any /predict/custom requests still queued so they don't hang
+    queue = app.state.batch_queue
+    while not queue.empty():
+        _, future = queue.get_nowait()
+        future.cancel()
+    
+    await app.state.http.aclose()
+
+async def fetch_live_data(client: httpx.AsyncClient, lat=28.6139, lon=77.2090) -> Dict[str, float]:
+    """Fetch live air quality data from Open-Meteo API (cached for CACHE_TTL seconds)"""
+    key = (lat, lon)
+    cached = _live_cache.get(key)
+    if cached and time.monotonic() - cached[0] < CACHE_TTL:
+        return cached[1]
+
+    # One upstream request per location; concurrent misses all await the same task and
+    # share its result, whether that's a reading or the fallback
+    task = _live_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(fetch_upstream(client, key, lat, lon))
+        _live_inflight[key] = task
+        task.add_done_callback(lambda _: _live_inflight.pop(key, None))
+    # Shielded so one cancelled caller doesn't cancel the fetch for everyone else
+    return await asyncio.shield(task)
+
+async def fetch_upstream(client: httpx.AsyncClient, key: Tuple[float, float], lat: float, lon: float) -> Dict[str, float]:
+    """Single Open-Meteo request for one location, falling back to sample data on error"""
+    try:
+        # Only request the hours around now instead of the full multi-day forecast
+        url = f"https://air-quality-api.open-meteo.com/v1/air-quality?latitude={lat}&longitude={lon}&hourly=pm10,pm2_5,nitrogen_dioxide,sulphur_dioxide,carbon_monoxide,ozone&past_hours=1&forecast_hours=1&timezone=auto"
+        response = await client.get(url)
         response.raise_for_status()
-        
+    
         data = response.json()
         hourly = data["hourly"]
-        
+    
         # Get the latest readings
         latest = {
             "pm2_5": hourly["pm2_5"][-1] if hourly["pm2_5"] else 0,
@@ -47,10 +296,11 @@ def fetch_live_data(lat=28.6139, lon=77.2090) -> Dict[str, float]:
             "o3": hourly["ozone"][-1] if hourly["ozone"] else 0,
             "nh3": 0.0  # Open-Meteo doesn't provide NH3, setting to 0
         }
-        
+    
         print("✅ Fetched live data:", latest)
+        _live_cache[key] = (time.monotonic(), latest)
         return latest
-        
+    
     except Exception as e:
         print(f"❌ Error fetching live data: {e}")
         # Return sample data as fallback
@@ -59,20 +309,27 @@ def fetch_live_data(lat=28.6139, lon=77.2090) -> Dict[str, float]:
             "so2": 5.0, "co": 0.5, "o3": 45.0, "nh3": 0.0
         }
 
+# One label per AQI_BINS category (plus the open-ended top one)
+AQI_LABELS = np.array([
+    "Good 😊",
+    "Moderate 😐",
+    "Unhealthy for Sensitive Groups 😷",
+    "Unhealthy 😞",
+    "Very Unhealthy 😨",
+    "Hazardous ☠️"
+])
+
+def get_aqi_status_vec(aqi) -> np.ndarray:
+    """Convert an array of AQI values to status categories in one vectorised call"""
+    aqi = np.asarray(aqi, dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        # Compiled classifier; labels are looked up here, outside the jitted code
+        return AQI_LABELS[aqi_buckets(aqi.ravel())].reshape(aqi.shape)
+    return AQI_LABELS[np.searchsorted(AQI_BINS, aqi)]
+
 def get_aqi_status(aqi: float) -> str:
     """Convert AQI value to status category"""
-    if aqi <= 50:
-        return "Good 😊"
-    elif aqi <= 100:
-        return "Moderate 😐"
-    elif aqi <= 150:
-        return "Unhealthy for Sensitive Groups 😷"
-    elif aqi <= 200:
-        return "Unhealthy 😞"
-    elif aqi <= 300:
-        return "Very Unhealthy 😨"
-    else:
-        return "Hazardous ☠️"
+    return str(AQI_LABELS[np.searchsorted(AQI_BINS, aqi)])
 
 @app.get("/")
 def home():
@@ -81,7 +338,8 @@ def home():
         "endpoints": {
             "health": "/health",
             "predict": "/predict",
-            "predict_custom": "/predict/custom?pm25=10&pm10=20&no2=15&so2=5&co=0.5&o3=40&nh3=0"
+            "predict_custom": "/predict/custom?pm25=10&pm10=20&no2=15&so2=5&co=0.5&o3=40&nh3=0",
+            "predict_batch": "POST /predict/batch"
         }
     }
 
@@ -93,33 +351,36 @@ def health_check():
     }
 
 @app.get("/predict")
-def predict():
+async def predict():
     if model is None:
         raise HTTPException(status_code=500, detail="Model not loaded")
     
     try:
         # Fetch live data
-        data = fetch_live_data()
+        data = await fetch_live_data(app.state.http)
         
         # Prepare features in the exact order expected by the model
         # Based on your model: ['PM2.5', 'PM10', 'NO', 'NO2', 'NH3', 'CO', 'SO2', 'O3']
         # Note: We don't have NO data, so we'll use 0 as placeholder
-        X = np.array([[
-            data["pm2_5"],      # PM2.5
-            data["pm10"],       # PM10  
-            0.0,               # NO (not available)
-            data["no2"],       # NO2
-            data["nh3"],       # NH3
-            data["co"],        # CO
-            data["so2"],       # SO2
-            data["o3"]         # O3
-        ]])
+        features = (
+            float(data["pm2_5"]),   # PM2.5
+            float(data["pm10"]),    # PM10
+            0.0,                    # NO (not available)
+            float(data["no2"]),     # NO2
+            float(data["nh3"]),     # NH3
+            float(data["co"]),      # CO
+            float(data["so2"]),     # SO2
+            float(data["o3"])       # O3
+        )
         
-        # Make prediction
-        prediction = model.predict(X)[0]
+        # Make prediction, skipping the model when these readings were scored recently
+        prediction = cached_prediction(features)
+        if prediction is None:
+            prediction = await run_in_threadpool(predict_row, features)
+            cache_prediction(features, prediction)
         
         return {
-            "AQI_Predicted": round(prediction, 2),
+            "AQI_Predicted": np.round(prediction, 2),  # numpy scalar, serialised natively by orjson
             "status": get_aqi_status(prediction),
             "pollutants": data,
             "location": "Delhi, India",
@@ -130,7 +391,7 @@ def predict():
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 @app.get("/predict/custom")
-def predict_custom(
+async def predict_custom(
     pm25: float, pm10: float, no2: float, so2: float, 
     co: float, o3: float, nh3: float = 0.0
 ):
@@ -138,14 +399,24 @@ def predict_custom(
         raise HTTPException(status_code=500, detail="Model not loaded")
     
     try:
-        X = np.array([[
-            pm25, 0.0, no2, nh3, co, so2, o3, pm10  # Adjusted order based on model features
-        ]])
+        # Adjusted order based on model features; quantised to 2 decimals so repeated queries hit the cache
+        features = tuple(round(v, 2) for v in (pm25, 0.0, no2, nh3, co, so2, o3, pm10))
+        # Validate before queueing so a bad row can't reach the shared batch
+        check_finite(to_features(features))
         
-        prediction = model.predict(X)[0]
+        prediction = cached_prediction(features)
+        if prediction is None:
+            if app.state.batch_task.done():
+                raise HTTPException(status_code=503, detail="Prediction worker not running")
+            
+            # Queue for the batch worker, which scores concurrent requests together
+            future = asyncio.get_running_loop().create_future()
+            await app.state.batch_queue.put((features, future))
+            prediction = await future
+            cache_prediction(features, prediction)
         
         return {
-            "AQI_Predicted": round(prediction, 2),
+            "AQI_Predicted": np.round(prediction, 2),  # numpy scalar, serialised natively by orjson
             "status": get_aqi_status(prediction),
             "input_parameters": {
                 "PM2.5": pm25, "PM10": pm10, "NO2": no2, 
@@ -153,9 +424,54 @@ def predict_custom(
             }
         }
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+@app.post("/predict/batch")
+async def predict_batch(request: BatchRequest):
+    if model is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+    
+    if not request.items:
+        return {"predictions": []}
+    
+    if len(request.items) > BATCH_REQUEST_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_REQUEST_MAX_ITEMS} items per batch")
+    
+    try:
+        X = to_features([
+            [r.pm25, 0.0, r.no2, r.nh3, r.co, r.so2, r.o3, r.pm10]  # Same order as /predict/custom
+            for r in request.items
+        ])
+        check_finite(X)
+        
+        # Score in the threadpool so a large batch doesn't block the event loop
+        predictions = await run_in_threadpool(model.predict, X)
+        
+        # Round the whole batch in one call, and return the response directly so
+        # FastAPI doesn't walk every row through jsonable_encoder before orjson
+        return ORJSONResponse({
+            "predictions": [
+                {"AQI_Predicted": aqi, "status": status}
+                for aqi, status in zip(np.round(predictions, 2).tolist(), get_aqi_status_vec(predictions).tolist())
+            ]
+        })
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # One worker per core by default; "auto" picks uvloop/httptools when they are installed
+    uvicorn.run(
+        "api_server:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="auto",
+        http="auto"
+    )
@@ -0,0 +1,152 @@
+import math
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    # Numba is optional: fall back to plain Python so the helpers still work
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+    prange = range
+
+# Upper bounds of each AQI status category; a value equal to a bound belongs to the lower category.
+# Single source for both the Numba classifier below and api_server's labels
+AQI_BINS = np.array([50, 100, 150, 200, 300], dtype=np.float64)
+
+# EPA AQI breakpoints, one row per category: [C_lo, C_hi, I_lo, I_hi]
+# Units: PM2.5/PM10 in μg/m³, NO2/SO2/O3 in ppb, CO in ppm (aqi_batch converts from μg/m³)
+# PM2.5 uses the 2024 revision of the table
+PM25_BREAKPOINTS = np.array([
+    [0.0, 9.0, 0, 50],
+    [9.1, 35.4, 51, 100],
+    [35.5, 55.4, 101, 150],
+    [55.5, 125.4, 151, 200],
+    [125.5, 225.4, 201, 300],
+    [225.5, 325.4, 301, 500]
+], dtype=np.float64)
+
+PM10_BREAKPOINTS = np.array([
+    [0, 54, 0, 50],
+    [55, 154, 51, 100],
+    [155, 254, 101, 150],
+    [255, 354, 151, 200],
+    [355, 424, 201, 300],
+    [425, 604, 301, 500]
+], dtype=np.float64)
+
+NO2_BREAKPOINTS = np.array([
+    [0, 53, 0, 50],
+    [54, 100, 51, 100],
+    [101, 360, 101, 150],
+    [361, 649, 151, 200],
+    [650, 1249, 201, 300],
+    [1250, 2049, 301, 500]
+], dtype=np.float64)
+
+SO2_BREAKPOINTS = np.array([
+    [0, 35, 0, 50],
+    [36, 75, 51, 100],
+    [76, 185, 101, 150],
+    [186, 304, 151, 200],
+    [305, 604, 201, 300],
+    [605, 1004, 301, 500]
+], dtype=np.float64)
+
+CO_BREAKPOINTS = np.array([
+    [0.0, 4.4, 0, 50],
+    [4.5, 9.4, 51, 100],
+    [9.5, 12.4, 101, 150],
+    [12.5, 15.4, 151, 200],
+    [15.5, 30.4, 201, 300],
+    [30.5, 50.4, 301, 500]
+], dtype=np.float64)
+
+O3_BREAKPOINTS = np.array([
+    [0, 54, 0, 50],
+    [55, 70, 51, 100],
+    [71, 85, 101, 150],
+    [86, 105, 151, 200],
+    [106, 200, 201, 300]
+], dtype=np.float64)
+
+# μg/m³ -> ppb at 25 °C and 1 atm: ppb = μg/m³ × 24.45 / molar mass (g/mol)
+MOLAR_VOLUME = 24.45
+NO2_UGM3_TO_PPB = MOLAR_VOLUME / 46.01
+SO2_UGM3_TO_PPB = MOLAR_VOLUME / 64.07
+O3_UGM3_TO_PPB = MOLAR_VOLUME / 48.00
+CO_UGM3_TO_PPM = MOLAR_VOLUME / 28.01 / 1000.0
+
+# cache=True writes the compiled machine code to __pycache__ so only the first run pays for compilation
+@njit(cache=True, fastmath=True)
+def epa_subindex(c, bp_lo, bp_hi, i_lo, i_hi):
+    """Linear interpolation of a concentration within one EPA breakpoint band"""
+    return (i_hi - i_lo) / (bp_hi - bp_lo) * (c - bp_lo) + i_lo
+
+@njit(cache=True)
+def truncate(c, decimals):
+    """Truncate (not round) to the given number of decimals, as EPA requires before lookup"""
+    scale = 10.0 ** decimals
+    # Small epsilon so values like 12.1 aren't pushed down to 12.0 by float error
+    return math.floor(c * scale + 1e-9) / scale
+
+@njit(cache=True)
+def pollutant_subindex(c, breakpoints, decimals):
+    """AQI sub-index of a single concentration, clamped to the table's range
+
+    The concentration is first truncated to `decimals` places, the precision the
+    table is written in, so continuous values can't fall into the gaps between bands.
+    """
+    c = truncate(c, decimals)
+    if c <= 0.0:
+        return 0.0
+    for k in range(breakpoints.shape[0]):
+        if c <= breakpoints[k, 1]:
+            return epa_subindex(c, breakpoints[k, 0], breakpoints[k, 1], breakpoints[k, 2], breakpoints[k, 3])
+    return breakpoints[breakpoints.shape[0] - 1, 3]
+
+@njit(cache=True, parallel=True)
+def aqi_batch(pm25, pm10, no2, so2, co, o3):
+    """Overall AQI (maximum pollutant sub-index) for each row of a batch of readings
+
+    All concentrations are in μg/m³, as reported by Open-Meteo (fetch_live_data).
+    NO2/SO2/O3 are converted to ppb and CO to ppm before the EPA tables are applied,
+    then truncated per EPA: PM2.5 and CO to 0.1, PM10/NO2/SO2/O3 to whole units.
+    The result is not rounded to an integer AQI.
+    """
+    n = pm25.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    for i in prange(n):
+        aqi = pollutant_subindex(pm25[i], PM25_BREAKPOINTS, 1)
+        aqi = max(aqi, pollutant_subindex(pm10[i], PM10_BREAKPOINTS, 0))
+        aqi = max(aqi, pollutant_subindex(no2[i] * NO2_UGM3_TO_PPB, NO2_BREAKPOINTS, 0))
+        aqi = max(aqi, pollutant_subindex(so2[i] * SO2_UGM3_TO_PPB, SO2_BREAKPOINTS, 0))
+        aqi = max(aqi, pollutant_subindex(co[i] * CO_UGM3_TO_PPM, CO_BREAKPOINTS, 1))
+        aqi = max(aqi, pollutant_subindex(o3[i] * O3_UGM3_TO_PPB, O3_BREAKPOINTS, 0))
+        out[i] = aqi
+    return out
+
+# Explicit signature: compiled eagerly at import (or loaded from the cache) instead of on first call
+@njit("int8(float64)", cache=True)
+def aqi_bucket(aqi):
+    """Index of the AQI status category for one value, per AQI_BINS"""
+    for k in range(AQI_BINS.shape[0]):
+        if aqi <= AQI_BINS[k]:
+            return k
+    return AQI_BINS.shape[0]
+
+# Not parallel: the per-value work is a few compares, and the workqueue threading layer
+# hangs interpreter exit when a parallel kernel is launched from a non-main thread (as in the API)
+@njit(cache=True)
+def aqi_buckets(aqi):
+    """Status category index for each AQI value; look labels up outside the compiled code"""
+    n = aqi.shape[0]
+    out = np.empty(n, dtype=np.int8)
+    for i in range(n):
+        out[i] = aqi_bucket(aqi[i])
+    return out
@@ -1,4 +1,6 @@
-import requests
+import asyncio
+
+import httpx
 
 endpoints = [
     ("API root", "http://127.0.0.1:8000/"),
@@ -6,9 +8,16 @@ endpoints = [
     ("Streamlit", "http://localhost:8501")
 ]
 
-for name, url in endpoints:
+async def probe(client, name, url):
     try:
-        r = requests.get(url, timeout=5)
+        r = await client.get(url, timeout=5)
         print(f"{name}: {url} -> {r.status_code}")
     except Exception as e:
         print(f"{name}: {url} -> ERROR: {e}")
+
+async def main():
+    # Probe all endpoints concurrently so total time is the slowest probe, not the sum
+    async with httpx.AsyncClient() as client:
+        await asyncio.gather(*(probe(client, name, url) for name, url in endpoints))
+
+asyncio.run(main())
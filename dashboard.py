@@ -2,6 +2,7 @@ import streamlit as st
 import requests
 import pandas as pd
 import time
+from collections import deque
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
@@ -61,22 +62,33 @@ sample_data = {
 
 # Initialize session state for storing historical data
 if 'aqi_history' not in st.session_state:
-    st.session_state.aqi_history = []
+    st.session_state.aqi_history = deque(maxlen=20)  # Keep only last 20 readings
 if 'pollutant_history' not in st.session_state:
     st.session_state.pollutant_history = []
-
-def fetch_data():
+# Reuse one HTTP session so polls keep the connection to the API alive
+if 'http_session' not in st.session_state:
+    st.session_state.http_session = requests.Session()
+
+# Cached slightly shorter than the refresh interval so each tick polls once,
+# while any other rerun in between reuses the last reading. Errors raise, so only
+# successful responses are cached
+@st.cache_data(ttl=refresh_rate - 1)
+def poll_api(api_url):
+    """Fetch the latest prediction from the API"""
+    response = st.session_state.http_session.get(f"{api_url}/predict", timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def fetch_data(api_url, use_sample_data):
     """Fetch data from API or use sample data"""
     if use_sample_data:
         return sample_data
     
     try:
-        response = requests.get(f"{api_url}/predict", timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"API Error: {response.status_code}")
-            return sample_data
+        return poll_api(api_url)
+    except requests.HTTPError as e:
+        st.error(f"API Error: {e.response.status_code}")
+        return sample_data
     except Exception as e:
         st.error(f"Connection Error: {str(e)}")
         return sample_data
@@ -94,34 +106,16 @@ def get_status_color(status):
     else:
         return "maroon"
 
-# Main dashboard layout
-col1, col2, col3 = st.columns([2, 1, 1])
-
-with col1:
-    st.subheader("📊 Live AQI Monitoring")
-    
-    # Fetch current data
-    data = fetch_data()
-    
-    # Display AQI metric with color coding
-    status_color = get_status_color(data["status"])
-    
-    st.metric(
-        label="Current AQI",
-        value=f"{data['AQI_Predicted']}",
-        delta=data["status"],
-        delta_color="off"
-    )
-    
-    # AQI gauge chart
-    fig_gauge = go.Figure(go.Indicator(
+def build_gauge():
+    """Build the AQI gauge with its static axis, bands and threshold styling"""
+    fig = go.Figure(go.Indicator(
         mode = "gauge+number+delta",
-        value = data["AQI_Predicted"],
+        value = 0,
         domain = {'x': [0, 1], 'y': [0, 1]},
         title = {'text': "AQI Level"},
         gauge = {
             'axis': {'range': [None, 300]},
-            'bar': {'color': status_color},
+            'bar': {'color': "green"},
             'steps': [
                 {'range': [0, 50], 'color': "lightgreen"},
                 {'range': [50, 100], 'color': "yellow"},
@@ -132,64 +126,94 @@ with col1:
             'threshold': {
                 'line': {'color': "red", 'width': 4},
                 'thickness': 0.75,
-                'value': data["AQI_Predicted"]
+                'value': 0
             }
         }
     ))
     
-    fig_gauge.update_layout(height=300)
-    st.plotly_chart(fig_gauge, use_container_width=True)
+    fig.update_layout(height=300)
+    return fig
+
+# Kept per session (not shared via st.cache_resource) since each tick mutates it in place
+if 'aqi_gauge' not in st.session_state:
+    st.session_state.aqi_gauge = build_gauge()
 
-with col2:
-    st.subheader("📈 AQI History")
+# Only the live panel reruns on each tick; the page scaffolding and sidebar stay as they are
+@st.fragment(run_every=refresh_rate)
+def live_panel():
+    # Main dashboard layout
+    col1, col2, col3 = st.columns([2, 1, 1])
+
+    with col1:
+        st.subheader("📊 Live AQI Monitoring")
     
-    # Update history
-    current_time = time.strftime("%H:%M:%S")
-    st.session_state.aqi_history.append({
-        "time": current_time,
-        "aqi": data["AQI_Predicted"]
-    })
+        # Fetch current data
+        data = fetch_data(api_url, use_sample_data)
     
-    # Keep only last 20 readings
-    if len(st.session_state.aqi_history) > 20:
-        st.session_state.aqi_history.pop(0)
+        # Display AQI metric with color coding
+        status_color = get_status_color(data["status"])
     
-    # Create history chart
-    if st.session_state.aqi_history:
-        history_df = pd.DataFrame(st.session_state.aqi_history)
-        st.line_chart(history_df.set_index("time"))
+        st.metric(
+            label="Current AQI",
+            value=f"{data['AQI_Predicted']}",
+            delta=data["status"],
+            delta_color="off"
+        )
+    
+        # AQI gauge chart: static layout is built once per session, only live values change per tick
+        fig_gauge = st.session_state.aqi_gauge
+        fig_gauge.data[0].value = data["AQI_Predicted"]
+        fig_gauge.data[0].gauge.bar.color = status_color
+        fig_gauge.data[0].gauge.threshold.value = data["AQI_Predicted"]
+    
+        st.plotly_chart(fig_gauge, use_container_width=True)
 
-with col3:
-    st.subheader("🌫️ Pollutant Levels")
+    with col2:
+        st.subheader("📈 AQI History")
     
-    pollutants = data["pollutants"]
+        # Update history
+        current_time = time.strftime("%H:%M:%S")
+        st.session_state.aqi_history.append({
+            "time": current_time,
+            "aqi": data["AQI_Predicted"]
+        })
     
-    # Display pollutant levels
-    for poll_name, value in pollutants.items():
-        st.progress(
-            min(value / 100, 1.0), 
-            text=f"{poll_name.upper()}: {value}"
-        )
+        # Create history chart
+        if st.session_state.aqi_history:
+            history_df = pd.DataFrame(list(st.session_state.aqi_history))
+            st.line_chart(history_df.set_index("time"))
 
-# Pollutant details section
-st.subheader("🔍 Detailed Pollutant Analysis")
+    with col3:
+        st.subheader("🌫️ Pollutant Levels")
+    
+        pollutants = data["pollutants"]
+    
+        # Display pollutant levels
+        for poll_name, value in pollutants.items():
+            st.progress(
+                min(value / 100, 1.0), 
+                text=f"{poll_name.upper()}: {value}"
+            )
+
+    # Pollutant details section
+    st.subheader("🔍 Detailed Pollutant Analysis")
+
+    poll_cols = st.columns(4)
+    pollutants = data["pollutants"]
 
-poll_cols = st.columns(4)
-pollutants = data["pollutants"]
+    with poll_cols[0]:
+        st.metric("PM2.5", f"{pollutants['pm2_5']} μg/m³")
+    with poll_cols[1]:
+        st.metric("PM10", f"{pollutants['pm10']} μg/m³")
+    with poll_cols[2]:
+        st.metric("NO₂", f"{pollutants['no2']} μg/m³")
+    with poll_cols[3]:
+        st.metric("O₃", f"{pollutants['o3']} μg/m³")
 
-with poll_cols[0]:
-    st.metric("PM2.5", f"{pollutants['pm2_5']} μg/m³")
-with poll_cols[1]:
-    st.metric("PM10", f"{pollutants['pm10']} μg/m³")
-with poll_cols[2]:
-    st.metric("NO₂", f"{pollutants['no2']} μg/m³")
-with poll_cols[3]:
-    st.metric("O₃", f"{pollutants['o3']} μg/m³")
+    # Location and timestamp info
+    st.info(f"📍 **Location**: {data.get('location', 'Unknown')} | ⏰ **Last Updated**: {current_time}")
 
-# Location and timestamp info
-st.info(f"📍 **Location**: {data.get('location', 'Unknown')} | ⏰ **Last Updated**: {current_time}")
+live_panel()
 
 # Auto-refresh
-st.sidebar.info(f"Next update in {refresh_rate} seconds")
-time.sleep(refresh_rate)
-st.rerun()
\ No newline at end of file
+st.sidebar.info(f"Auto-refreshing every {refresh_rate} seconds")
@@ -0,0 +1,20 @@
+import os
+
+import joblib
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+# Convert the trained RandomForest in model.pkl to model.onnx for ONNX Runtime serving
+base_dir = os.path.dirname(os.path.abspath(__file__))
+model_path = os.path.join(base_dir, "model.pkl")
+onnx_path = os.path.join(base_dir, "model.onnx")
+
+model = joblib.load(model_path)
+
+# 8 features: ['PM2.5', 'PM10', 'NO', 'NO2', 'NH3', 'CO', 'SO2', 'O3']
+onnx_model = convert_sklearn(model, initial_types=[("X", FloatTensorType([None, 8]))])
+
+with open(onnx_path, "wb") as f:
+    f.write(onnx_model.SerializeToString())
+
+print(f"✅ Exported ONNX model to {onnx_path}")
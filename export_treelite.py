@@ -0,0 +1,24 @@
+import os
+
+import joblib
+import tl2cgen
+import treelite
+
+# Compile the trained RandomForest in model.pkl to a native shared library for serving
+base_dir = os.path.dirname(os.path.abspath(__file__))
+model_path = os.path.join(base_dir, "model.pkl")
+# Must match COMPILED_MODEL_NAME in api_server.py
+lib_path = os.path.join(base_dir, "model.dll" if os.name == "nt" else "model.so")
+
+model = joblib.load(model_path)
+tl_model = treelite.sklearn.import_model(model)
+
+# parallel_comp splits the generated code into chunks so the C compiler can build them in parallel
+tl2cgen.export_lib(
+    tl_model,
+    toolchain="msvc" if os.name == "nt" else "gcc",
+    libpath=lib_path,
+    params={"parallel_comp": 8}
+)
+
+print(f"✅ Exported compiled model to {lib_path}")
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from aqi_index import (
+    AQI_BINS, CO_BREAKPOINTS, CO_UGM3_TO_PPM, NO2_BREAKPOINTS, NO2_UGM3_TO_PPB,
+    PM25_BREAKPOINTS, aqi_batch, aqi_bucket, aqi_buckets, pollutant_subindex
+)
+
+def single(pm25=0.0, pm10=0.0, no2=0.0, so2=0.0, co=0.0, o3=0.0):
+    """AQI of one reading (all μg/m³) through aqi_batch"""
+    cols = [np.array([v], dtype=np.float64) for v in (pm25, pm10, no2, so2, co, o3)]
+    return aqi_batch(*cols)[0]
+
+@pytest.mark.parametrize("pm25, expected", [
+    (9.0, 50),      # top of Good (2024 table)
+    (9.1, 51),      # bottom of Moderate
+    (35.4, 100),
+    (225.5, 301),   # bottom of Hazardous (2024 table)
+    (9.05, 50),     # truncated to 9.0, not interpolated into the 9.0-9.1 gap
+])
+def test_pm25_breakpoint_edges(pm25, expected):
+    assert pollutant_subindex(pm25, PM25_BREAKPOINTS, 1) == pytest.approx(expected)
+
+def test_no2_between_bands_is_truncated():
+    # 53.5 ppb truncates to 53 ppb, the top of Good, instead of dropping below 51
+    assert pollutant_subindex(53.5, NO2_BREAKPOINTS, 0) == pytest.approx(50)
+
+def test_co_truncated_to_tenth_ppm():
+    assert pollutant_subindex(4.45, CO_BREAKPOINTS, 1) == pytest.approx(50)
+
+def test_no2_ugm3_conversion():
+    # 100 ppb NO2 is 188.18 μg/m³ at 25 °C, the top of Moderate
+    assert NO2_UGM3_TO_PPB == pytest.approx(24.45 / 46.01)
+    assert single(no2=100 * 46.01 / 24.45) == pytest.approx(100)
+
+def test_co_ugm3_conversion():
+    # 9.4 ppm CO is 10769 μg/m³ at 25 °C, the top of Moderate
+    assert CO_UGM3_TO_PPM == pytest.approx(24.45 / 28.01 / 1000)
+    assert single(co=9.4 * 28.01 * 1000 / 24.45) == pytest.approx(100)
+
+def test_aqi_batch_takes_max_subindex_per_row():
+    pm25 = np.array([9.0, 35.4])
+    zeros = np.zeros(2)
+    pm10 = np.array([154.0, 0.0])
+    assert aqi_batch(pm25, pm10, zeros, zeros, zeros, zeros) == pytest.approx([100, 100])
+
+@pytest.mark.parametrize("aqi, expected", [
+    (0.0, 0), (50.0, 0), (50.01, 1), (100.0, 1), (150.0, 2),
+    (200.0, 3), (300.0, 4), (300.01, 5), (1000.0, 5)
+])
+def test_aqi_bucket_follows_aqi_bins(aqi, expected):
+    assert aqi_bucket(aqi) == expected
+    assert aqi_bucket(aqi) == np.searchsorted(AQI_BINS, aqi)
+
+def test_aqi_buckets_matches_scalar_bucket():
+    values = np.array([10.0, 75.0, 120.0, 180.0, 250.0, 400.0])
+    assert aqi_buckets(values).tolist() == [0, 1, 2, 3, 4, 5]